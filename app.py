@@ -6,9 +6,6 @@ from database import (
     get_watchlist, add_search_history, get_recent_searches
 )
 
-# Initialize database
-init_db()
-
 # Page configuration
 st.set_page_config(
     page_title="Stock Analysis Dashboard",
@@ -17,9 +14,40 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+@st.cache_resource(show_spinner=False)
+def get_engine_and_init():
+    """Create the tables once per process and share the pooled engine"""
+    return init_db()
+
+@st.cache_data(show_spinner=False)
+def load_css(path: str) -> str:
+    """Read the stylesheet once per process"""
+    with open(path) as f:
+        return f.read()
+
+@st.fragment
+def render_chart(hist_data: pd.DataFrame, ticker_symbol: str, period: str):
+    """Render the price chart; toggling an indicator reruns only this fragment"""
+    st.subheader('Price Chart')
+
+    # Technical Indicators
+    col1, col2, col3, col4, col5 = st.columns(5)
+    show_indicators = {
+        'sma': col1.checkbox('Show SMA (20, 50)'),
+        'ema': col2.checkbox('Show EMA (20)'),
+        'bollinger': col3.checkbox('Show Bollinger Bands'),
+        'rsi': col4.checkbox('Show RSI'),
+        'macd': col5.checkbox('Show MACD')
+    }
+
+    fig = create_price_chart(hist_data, ticker_symbol, period, show_indicators)
+    st.plotly_chart(fig, use_container_width=True)
+
+# Initialize database
+get_engine_and_init()
+
 # Load custom CSS
-with open('styles.css') as f:
-    st.markdown(f'<style>{f.read()}</style>', unsafe_allow_html=True)
+st.markdown(f'<style>{load_css("styles.css")}</style>', unsafe_allow_html=True)
 
 # Initialize session state
 if 'ticker_symbol' not in st.session_state:
@@ -30,24 +58,14 @@ if 'time_period' not in st.session_state:
 # Sidebar
 st.sidebar.title('Stock Analysis Dashboard')
 
-# Technical Indicators Section in Sidebar
-st.sidebar.subheader("Technical Indicators")
-show_indicators = {
-    'sma': st.sidebar.checkbox('Show SMA (20, 50)'),
-    'ema': st.sidebar.checkbox('Show EMA (20)'),
-    'bollinger': st.sidebar.checkbox('Show Bollinger Bands'),
-    'rsi': st.sidebar.checkbox('Show RSI'),
-    'macd': st.sidebar.checkbox('Show MACD')
-}
-
 # Recent Searches
 recent_searches = get_recent_searches()
 if recent_searches:
     st.sidebar.subheader("Recent Searches")
-    for search in recent_searches:
-        if st.sidebar.button(f"{search.symbol} ({search.period})", key=f"recent_{search.id}"):
-            st.session_state.ticker_symbol = search.symbol
-            st.session_state.time_period = search.period
+    for symbol, period, _ in recent_searches:
+        if st.sidebar.button(f"{symbol} ({period})", key=f"recent_{symbol}_{period}"):
+            st.session_state.ticker_symbol = symbol
+            st.session_state.time_period = period
             st.rerun()
 
 # Manual input if no recent searches are selected
@@ -65,21 +83,24 @@ st.session_state.time_period = time_period
 # Watchlist
 st.sidebar.subheader("Watchlist")
 watchlist = get_watchlist()
-for item in watchlist:
+for item_id, symbol in watchlist:
     col1, col2 = st.sidebar.columns([3, 1])
     with col1:
-        if st.button(item.symbol, key=f"watchlist_{item.id}"):
-            st.session_state.ticker_symbol = item.symbol
+        if st.button(symbol, key=f"watchlist_{item_id}"):
+            st.session_state.ticker_symbol = symbol
             st.rerun()
     with col2:
-        if st.button("❌", key=f"remove_{item.id}"):
-            remove_from_watchlist(item.symbol)
+        if st.button("❌", key=f"remove_{item_id}"):
+            remove_from_watchlist(symbol)
             st.rerun()
 
 # Main content
 if st.session_state.ticker_symbol:
-    # Add to search history
-    add_search_history(st.session_state.ticker_symbol, st.session_state.time_period)
+    # Add to search history, only when the query changed since the last rerun
+    current_search = (st.session_state.ticker_symbol, st.session_state.time_period)
+    if st.session_state.get('last_search') != current_search:
+        add_search_history(*current_search)
+        st.session_state.last_search = current_search
 
     # Fetch data
     with st.spinner('Fetching stock data...'):
@@ -95,9 +116,9 @@ if st.session_state.ticker_symbol:
                 add_to_watchlist(st.session_state.ticker_symbol)
                 st.success(f"Added {st.session_state.ticker_symbol} to watchlist!")
         with col3:
-            current_price = hist_data['Close'].iloc[-1]
-            price_change = current_price - hist_data['Close'].iloc[-2]
-            price_change_pct = (price_change / hist_data['Close'].iloc[-2]) * 100
+            close = hist_data['Close'].to_numpy()
+            current_price, prev_price = float(close[-1]), float(close[-2])
+            price_change_pct = (current_price / prev_price - 1) * 100
             st.metric(
                 "Current Price",
                 f"${current_price:.2f}",
@@ -121,9 +142,7 @@ if st.session_state.ticker_symbol:
             st.metric("52W Low", f"${company_info.get('fiftyTwoWeekLow', 0):.2f}")
 
         # Price chart with technical indicators
-        st.subheader('Price Chart')
-        fig = create_price_chart(hist_data, show_indicators)
-        st.plotly_chart(fig, use_container_width=True)
+        render_chart(hist_data, st.session_state.ticker_symbol, st.session_state.time_period)
 
         # Additional company information
         st.subheader('Company Overview')
@@ -132,25 +151,17 @@ if st.session_state.ticker_symbol:
 
         # Financial metrics table
         st.subheader('Financial Metrics')
-        metrics_df = pd.DataFrame({
-            'Metric': [
-                'Revenue (TTM)',
-                'Profit Margin',
-                'Operating Margin',
-                'Return on Equity',
-                'Total Debt',
-                'Total Cash'
-            ],
-            'Value': [
-                format_large_number(company_info.get('totalRevenue', 0)),
-                f"{company_info.get('profitMargins', 0)*100:.2f}%",
-                f"{company_info.get('operatingMargins', 0)*100:.2f}%",
-                f"{company_info.get('returnOnEquity', 0)*100:.2f}%",
-                format_large_number(company_info.get('totalDebt', 0)),
-                format_large_number(company_info.get('totalCash', 0))
-            ]
-        })
-        st.table(metrics_df)
+        financial_metrics = [
+            ('Revenue (TTM)', format_large_number(company_info.get('totalRevenue', 0))),
+            ('Profit Margin', f"{company_info.get('profitMargins', 0)*100:.2f}%"),
+            ('Operating Margin', f"{company_info.get('operatingMargins', 0)*100:.2f}%"),
+            ('Return on Equity', f"{company_info.get('returnOnEquity', 0)*100:.2f}%"),
+            ('Total Debt', format_large_number(company_info.get('totalDebt', 0))),
+            ('Total Cash', format_large_number(company_info.get('totalCash', 0)))
+        ]
+        metric_cols = st.columns(3)
+        for i, (label, value) in enumerate(financial_metrics):
+            metric_cols[i % 3].metric(label, value)
 
     else:
         st.error(f"Unable to fetch data for {st.session_state.ticker_symbol}. Please check the symbol and try again.")
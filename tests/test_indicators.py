@@ -0,0 +1,138 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import utils
+
+
+def reference_indicators(close: np.ndarray) -> pd.DataFrame:
+    """The original pandas formulas the kernels must reproduce"""
+    df = pd.DataFrame({'Close': close})
+
+    delta = df['Close'].diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+    rs = gain / loss
+    df['RSI'] = 100 - (100 / (1 + rs))
+
+    df['SMA_20'] = df['Close'].rolling(window=20).mean()
+    df['SMA_50'] = df['Close'].rolling(window=50).mean()
+    df['EMA_20'] = df['Close'].ewm(span=20, adjust=False).mean()
+
+    df['BB_middle'] = df['Close'].rolling(window=20).mean()
+    df['BB_upper'] = df['BB_middle'] + 2 * df['Close'].rolling(window=20).std()
+    df['BB_lower'] = df['BB_middle'] - 2 * df['Close'].rolling(window=20).std()
+
+    exp1 = df['Close'].ewm(span=12, adjust=False).mean()
+    exp2 = df['Close'].ewm(span=26, adjust=False).mean()
+    df['MACD'] = exp1 - exp2
+    df['MACD_Signal'] = df['MACD'].ewm(span=9, adjust=False).mean()
+    df['MACD_Hist'] = df['MACD'] - df['MACD_Signal']
+
+    return df[list(utils._TA_COLUMNS)]
+
+
+def random_walk(n: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return 100 + np.cumsum(rng.normal(0, 1, n))
+
+
+def cent_walk_then_flat(start: float, vol: float, seed: int) -> np.ndarray:
+    """A cent-rounded walk that ends in 15 identical closes, like a halted ticker"""
+    rng = np.random.default_rng(seed)
+    walk = np.round(start + np.cumsum(rng.normal(0, vol, 150)), 2)
+    return np.concatenate([walk, np.full(15, walk[-1])])
+
+
+def with_gap(close: np.ndarray) -> np.ndarray:
+    close = close.copy()
+    close[len(close) // 2] = np.nan
+    return close
+
+
+def assert_matches_reference(values: np.ndarray, close: np.ndarray):
+    expected = reference_indicators(close).to_numpy()
+    assert values.shape == expected.shape
+    np.testing.assert_allclose(values, expected, rtol=0, atol=1e-9, equal_nan=True)
+
+
+SERIES = {
+    'empty': np.array([], dtype=np.float64),
+    'single': np.array([101.5]),
+    'shorter_than_14': random_walk(10),
+    'shorter_than_20': random_walk(17),
+    'shorter_than_50': random_walk(40),
+    'long': random_walk(1300),
+    'flat': np.full(80, 42.0),
+    'flat_run': np.concatenate([random_walk(30), np.full(20, 99.0), random_walk(30, seed=1)]),
+    # Running-sum leftovers once made these return RSI 0, 22.2 and divide by zero
+    'halt_rsi_zero': cent_walk_then_flat(50, 2, seed=23),
+    'halt_rsi_partial': cent_walk_then_flat(50, 2, seed=5),
+    'halt_zero_division': cent_walk_then_flat(30, 1, seed=20),
+}
+
+
+@pytest.fixture(params=['talib', 'bottleneck', 'pandas'])
+def rolling_backend(request, monkeypatch):
+    """Run the vectorized path against each rolling-window backend"""
+    if request.param == 'talib' and not utils._HAS_TALIB:
+        pytest.skip('TA-Lib is not installed')
+    if request.param == 'bottleneck' and not utils._HAS_BOTTLENECK:
+        pytest.skip('bottleneck is not installed')
+    monkeypatch.setattr(utils, '_HAS_TALIB', request.param == 'talib')
+    monkeypatch.setattr(utils, '_HAS_BOTTLENECK', request.param == 'bottleneck')
+    return request.param
+
+
+@pytest.mark.parametrize('name', SERIES)
+def test_ta_loop_matches_pandas(name):
+    close = SERIES[name]
+    assert_matches_reference(utils._ta_loop(close), close)
+
+
+def test_ta_loop_accepts_float32():
+    close = random_walk(500).astype(np.float32)
+    assert_matches_reference(utils._ta_loop(close), close.astype(np.float64))
+
+
+@pytest.mark.parametrize('name', SERIES)
+def test_ta_vectorized_matches_pandas(name, rolling_backend):
+    close = SERIES[name]
+    assert_matches_reference(utils._ta_vectorized(close), close)
+
+
+def test_ta_vectorized_handles_gap(rolling_backend):
+    close = with_gap(random_walk(300))
+    assert_matches_reference(utils._ta_vectorized(close), close)
+
+
+def test_flat_prices_have_undefined_rsi():
+    close = SERIES['flat']
+    assert np.isnan(utils._ta_loop(close)[:, 0]).all()
+    assert np.isnan(utils._ta_vectorized(close)[:, 0]).all()
+
+
+@pytest.mark.parametrize('name', ['halt_rsi_zero', 'halt_rsi_partial', 'halt_zero_division'])
+def test_halted_prices_have_undefined_rsi(name):
+    close = SERIES[name]
+    assert np.isnan(utils._ta_loop(close)[-1, 0])
+    assert np.isnan(utils._ta_vectorized(close)[-1, 0])
+
+
+@pytest.mark.parametrize('use_numba', [True, False])
+@pytest.mark.parametrize('close', [random_walk(300), with_gap(random_walk(300))], ids=['clean', 'gap'])
+def test_calculate_technical_indicators(close, use_numba, monkeypatch):
+    monkeypatch.setattr(utils, '_HAS_NUMBA', use_numba)
+    index = pd.date_range('2024-01-01', periods=len(close), freq='B')
+    df = pd.DataFrame({'Close': close, 'Volume': 1000}, index=index)
+
+    result = utils.calculate_technical_indicators(df)
+
+    assert list(result.columns) == ['Close', 'Volume', *utils._TA_COLUMNS]
+    assert result.index.equals(index)
+    assert 'RSI' not in df.columns
+    np.testing.assert_allclose(
+        result[list(utils._TA_COLUMNS)].to_numpy(),
+        reference_indicators(close).to_numpy(),
+        rtol=0, atol=1e-9, equal_nan=True
+    )
@@ -0,0 +1,82 @@
+import base64
+
+import numpy as np
+import pandas as pd
+
+import utils
+
+
+def ohlc_frame(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    return pd.DataFrame({
+        'Open': close - rng.uniform(0, 1, n),
+        'High': close + rng.uniform(0, 2, n),
+        'Low': close - rng.uniform(1, 2, n),
+        'Close': close,
+        'Volume': rng.integers(1_000, 10_000, n),
+    }, index=pd.date_range('2024-01-01', periods=n, freq='B'))
+
+
+def trace_values(values) -> np.ndarray:
+    """Decode a trace array, which comes back base64-typed from a cached figure"""
+    if isinstance(values, dict):
+        return np.frombuffer(base64.b64decode(values['bdata']), dtype=values['dtype'])
+    return np.asarray(values)
+
+
+def test_base_chart_tracks_rewritten_last_bar():
+    df = ohlc_frame(30)
+    utils.create_price_chart(df, 'REWRITE', '1mo')
+
+    # yfinance rewrites today's bar intraday without changing the date or length
+    updated = df.copy()
+    updated.loc[updated.index[-1], ['High', 'Close']] += 1.5
+    updated.loc[updated.index[-1], 'Volume'] += 500
+    fig = utils.create_price_chart(updated, 'REWRITE', '1mo')
+
+    candles, volume = fig.data[0], fig.data[1]
+    assert trace_values(candles.close)[-1] == updated['Close'].iloc[-1]
+    assert trace_values(candles.high)[-1] == updated['High'].iloc[-1]
+    assert trace_values(volume.y)[-1] == updated['Volume'].iloc[-1]
+
+
+def test_format_large_number_scalar_and_array_agree():
+    values = [1.5e9, -2e6, 999, np.nan, 0, -1500]
+    expected = ['1.50B', '-2.00M', '999.00', 'N/A', '0.00', '-1.50K']
+
+    assert [utils.format_large_number(v) for v in values] == expected
+    assert utils.format_large_number_array(values).tolist() == expected
+
+
+def test_format_large_number_none():
+    assert utils.format_large_number(None) == "N/A"
+
+
+def test_downsample_ohlc_buckets():
+    # Not a multiple of the bucket size, so the last bucket is partial
+    n = 2 * utils.MAX_CHART_POINTS + 3
+    df = ohlc_frame(n)
+    df['RSI'] = np.arange(n, dtype=np.float64)
+
+    reduced = utils.downsample_ohlc(df)
+
+    bucket = 3
+    assert -(-n // utils.MAX_CHART_POINTS) == bucket
+    assert len(reduced) == -(-n // bucket) <= utils.MAX_CHART_POINTS
+    assert reduced.index.equals(df.index[::bucket])
+    assert list(reduced.columns) == list(df.columns)
+    for position in (0, 1, len(reduced) - 1):
+        rows = df.iloc[position * bucket:(position + 1) * bucket]
+        row = reduced.iloc[position]
+        assert row['Open'] == rows['Open'].iloc[0]
+        assert row['High'] == rows['High'].max()
+        assert row['Low'] == rows['Low'].min()
+        assert row['Close'] == rows['Close'].iloc[-1]
+        assert row['Volume'] == rows['Volume'].sum()
+        assert row['RSI'] == rows['RSI'].iloc[-1]
+
+
+def test_downsample_ohlc_passes_short_frames_through():
+    df = ohlc_frame(utils.MAX_CHART_POINTS)
+    assert utils.downsample_ohlc(df) is df
@@ -1,75 +1,337 @@
+import streamlit as st
 import yfinance as yf
 import pandas as pd
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import numpy as np
+import math
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from numba import njit
+    _HAS_NUMBA = True
+except ImportError:
+    _HAS_NUMBA = False
+
+    def njit(**kwargs):
+        return lambda f: f
+
+try:
+    import talib
+    _HAS_TALIB = True
+except ImportError:
+    _HAS_TALIB = False
+
+try:
+    import bottleneck as bn
+    _HAS_BOTTLENECK = True
+except ImportError:
+    _HAS_BOTTLENECK = False
+
+# Column order of the array returned by _ta_loop
+_TA_COLUMNS = (
+    'RSI', 'SMA_20', 'SMA_50', 'EMA_20',
+    'BB_middle', 'BB_upper', 'BB_lower',
+    'MACD', 'MACD_Signal', 'MACD_Hist'
+)
+_TA_WIDTH = len(_TA_COLUMNS)
+
+# Seconds before cached price history, and charts built from it, are refetched
+HISTORY_TTL = 300
+
+# Shared workers so history and info requests overlap instead of running back to back
+_FETCH_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix='yfinance')
+
+# (threshold, suffix) pairs for format_large_number, largest first
+_SCALES = ((1e9, 'B'), (1e6, 'M'), (1e3, 'K'))
+
+# Upper bound on candles sent to the browser per chart
+MAX_CHART_POINTS = 2000
+
+# Above this many rows, draw OHLC bars and WebGL lines instead of SVG candles
+WEBGL_THRESHOLD = 1000
+
+@st.cache_data(ttl=HISTORY_TTL, show_spinner=False)
+def _cached_history(ticker_symbol: str, period: str) -> pd.DataFrame:
+    """
+    Fetch OHLC history from Yahoo Finance, memoized across reruns
+    """
+    return yf.Ticker(ticker_symbol).history(period=period)
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _cached_info(ticker_symbol: str) -> dict:
+    """
+    Fetch company info from Yahoo Finance, memoized across reruns
+    """
+    return yf.Ticker(ticker_symbol).info
 
 def get_stock_data(ticker_symbol: str, period: str = "1y") -> tuple:
     """
     Fetch stock data and company info from Yahoo Finance
+
+    Both requests run concurrently. Failures raise inside the cached
+    fetchers, so they are never memoized and the next rerun retries them.
     """
+    hist_future = _FETCH_POOL.submit(_cached_history, ticker_symbol, period)
+    info_future = _FETCH_POOL.submit(_cached_info, ticker_symbol)
     try:
-        ticker = yf.Ticker(ticker_symbol)
-        hist = ticker.history(period=period)
-        info = ticker.info
-        return hist, info
-    except Exception as e:
+        hist = hist_future.result()
+        info = info_future.result()
+    except Exception:
         return None, None
+    return hist, info
 
-def calculate_technical_indicators(df: pd.DataFrame) -> pd.DataFrame:
+@njit(cache=True)
+def _ta_loop(close: np.ndarray) -> np.ndarray:
     """
-    Calculate technical indicators without pandas_ta
+    Compute every indicator in a single pass over the close prices,
+    matching the pandas rolling/ewm(adjust=False) definitions
+    """
+    n = close.shape[0]
+    out = np.full((n, _TA_WIDTH), np.nan)
+    if n == 0:
+        return out
+
+    a20 = 2.0 / 21.0
+    a12 = 2.0 / 13.0
+    a26 = 2.0 / 27.0
+    a9 = 2.0 / 10.0
+    ema20 = float(close[0])
+    exp1 = ema20
+    exp2 = ema20
+    signal = 0.0
+    sum50 = 0.0
+    mean20 = 0.0
+    m2_20 = 0.0
+    gain_sum = 0.0
+    same_run = 0
+    no_gain_run = 0
+    no_loss_run = 0
+    loss_sum = 0.0
+
+    for i in range(n):
+        x = float(close[i])
+
+        # EMA and MACD
+        if i > 0:
+            ema20 = a20 * x + (1.0 - a20) * ema20
+            exp1 = a12 * x + (1.0 - a12) * exp1
+            exp2 = a26 * x + (1.0 - a26) * exp2
+        macd = exp1 - exp2
+        if i == 0:
+            signal = macd
+        else:
+            signal = a9 * macd + (1.0 - a9) * signal
+        out[i, 3] = ema20
+        out[i, 7] = macd
+        out[i, 8] = signal
+        out[i, 9] = macd - signal
+
+        # Like pandas, a window of identical prices yields the exact price and
+        # zero deviation; the running state is resynced rather than left to drift
+        if i > 0 and x == close[i - 1]:
+            same_run += 1
+        else:
+            same_run = 1
+
+        # SMA 50
+        sum50 += x
+        if i >= 50:
+            sum50 -= float(close[i - 50])
+        if same_run >= 50:
+            sum50 = 50.0 * x
+            out[i, 2] = x
+        elif i >= 49:
+            out[i, 2] = sum50 / 50.0
+
+        # SMA 20 and Bollinger Bands share one sliding Welford mean/variance
+        if i < 20:
+            delta = x - mean20
+            mean20 += delta / (i + 1)
+            m2_20 += delta * (x - mean20)
+        else:
+            y = float(close[i - 20])
+            prev_mean = mean20
+            mean20 += (x - y) / 20.0
+            m2_20 += (x - y) * (x - mean20 + y - prev_mean)
+        if same_run >= 20:
+            mean20 = x
+            m2_20 = 0.0
+        if i >= 19:
+            std20 = math.sqrt(max(m2_20, 0.0) / 19.0)
+            out[i, 1] = mean20
+            out[i, 4] = mean20
+            out[i, 5] = mean20 + 2.0 * std20
+            out[i, 6] = mean20 - 2.0 * std20
+
+        # RSI over a 14-period simple average of gains and losses
+        d = 0.0
+        if i > 0:
+            d = x - float(close[i - 1])
+            if d > 0:
+                gain_sum += d
+            elif d < 0:
+                loss_sum -= d
+        no_gain_run = no_gain_run + 1 if d <= 0 else 0
+        no_loss_run = no_loss_run + 1 if d >= 0 else 0
+        if i >= 15:
+            d = float(close[i - 14]) - float(close[i - 15])
+            if d > 0:
+                gain_sum -= d
+            elif d < 0:
+                loss_sum += d
+        # Adding and later removing a delta can leave rounding behind; a window
+        # with no up (or down) moves must average exactly zero, as in pandas
+        if no_gain_run >= 14:
+            gain_sum = 0.0
+        if no_loss_run >= 14:
+            loss_sum = 0.0
+        if i >= 13:
+            avg_gain = gain_sum / 14.0
+            avg_loss = loss_sum / 14.0
+            if avg_loss > 0:
+                out[i, 0] = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+            elif avg_gain > 0:
+                out[i, 0] = 100.0
+
+    return out
+
+def _flat_windows(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Mask of positions whose trailing window holds a single repeated value
     """
+    flat = np.zeros(len(values), dtype=bool)
+    if len(values) >= window:
+        same = np.concatenate(([0], np.cumsum(values[1:] == values[:-1])))
+        flat[window - 1:] = same[window - 1:] - same[:len(values) - window + 1] == window - 1
+    return flat
+
+def _rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Trailing moving average, NaN until the window is full
+    """
+    if len(values) < window:
+        return np.full(len(values), np.nan)
+    # TA-Lib carries a NaN through every later window, so only use it on gap-free input
+    if _HAS_TALIB and not np.isnan(values).any():
+        result = talib.SMA(values, timeperiod=window)
+    elif _HAS_BOTTLENECK:
+        result = bn.move_mean(values, window)
+    else:
+        return pd.Series(values).rolling(window=window).mean().to_numpy()
+
+    # Running sums drift over flat stretches; pandas returns the exact value there
+    flat = _flat_windows(values, window)
+    result[flat] = values[flat]
+    return result
+
+def _rolling_std(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Trailing sample standard deviation, NaN until the window is full
+    """
+    if len(values) < window:
+        return np.full(len(values), np.nan)
+    if _HAS_TALIB and not np.isnan(values).any():
+        # TA-Lib's STDDEV is the population deviation; rescale to ddof=1
+        result = talib.STDDEV(values, timeperiod=window, nbdev=1) * math.sqrt(window / (window - 1))
+    elif _HAS_BOTTLENECK:
+        result = bn.move_std(values, window, ddof=1)
+    else:
+        return pd.Series(values).rolling(window=window).std().to_numpy()
+
+    result[_flat_windows(values, window)] = 0.0
+    return result
+
+def _ta_vectorized(close: np.ndarray) -> np.ndarray:
+    """
+    Calculate technical indicators with array-level rolling windows,
+    returning the same column layout as _ta_loop
+    """
+    close_series = pd.Series(close)
+
     # RSI
-    delta = df['Close'].diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-    rs = gain / loss
-    df['RSI'] = 100 - (100 / (1 + rs))
+    delta = np.diff(close, prepend=np.nan)
+    gain = _rolling_mean(np.where(delta > 0, delta, 0.0), 14)
+    loss = _rolling_mean(np.where(delta < 0, -delta, 0.0), 14)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = 100 - (100 / (1 + gain / loss))
 
     # Moving Averages
-    df['SMA_20'] = df['Close'].rolling(window=20).mean()
-    df['SMA_50'] = df['Close'].rolling(window=50).mean()
-    df['EMA_20'] = df['Close'].ewm(span=20, adjust=False).mean()
+    sma20 = _rolling_mean(close, 20)
+    sma50 = _rolling_mean(close, 50)
+    ema20 = close_series.ewm(span=20, adjust=False).mean().to_numpy()
 
     # Bollinger Bands
-    df['BB_middle'] = df['Close'].rolling(window=20).mean()
-    df['BB_upper'] = df['BB_middle'] + 2 * df['Close'].rolling(window=20).std()
-    df['BB_lower'] = df['BB_middle'] - 2 * df['Close'].rolling(window=20).std()
+    std20 = _rolling_std(close, 20)
 
     # MACD
-    exp1 = df['Close'].ewm(span=12, adjust=False).mean()
-    exp2 = df['Close'].ewm(span=26, adjust=False).mean()
-    df['MACD'] = exp1 - exp2
-    df['MACD_Signal'] = df['MACD'].ewm(span=9, adjust=False).mean()
-    df['MACD_Hist'] = df['MACD'] - df['MACD_Signal']
+    exp1 = close_series.ewm(span=12, adjust=False).mean().to_numpy()
+    exp2 = close_series.ewm(span=26, adjust=False).mean().to_numpy()
+    macd = exp1 - exp2
+    signal = pd.Series(macd).ewm(span=9, adjust=False).mean().to_numpy()
 
-    return df
+    return np.column_stack((
+        rsi, sma20, sma50, ema20,
+        sma20, sma20 + 2 * std20, sma20 - 2 * std20,
+        macd, signal, macd - signal
+    ))
 
-def create_price_chart(df: pd.DataFrame, show_indicators: dict = None, dark_mode: bool = True) -> go.Figure:
+def calculate_technical_indicators(df: pd.DataFrame) -> pd.DataFrame:
     """
-    Create an interactive price chart with technical indicators
+    Calculate technical indicators without pandas_ta
+
+    Uses the compiled single-pass kernel when numba is installed; gaps in
+    the price series fall back to NaN-aware rolling windows. All indicator
+    columns are attached in one concat rather than one insert per column.
+    Not memoized: recomputing is cheaper than hashing and unpickling the frame.
     """
-    if show_indicators is None:
-        show_indicators = {
-            'sma': False,
-            'ema': False,
-            'bollinger': False,
-            'rsi': False,
-            'macd': False
-        }
+    close = np.ascontiguousarray(df['Close'].to_numpy(), dtype=np.float64)
+    if _HAS_NUMBA and not np.isnan(close).any():
+        values = _ta_loop(close)
+    else:
+        values = _ta_vectorized(close)
 
-    # Calculate indicators
-    df = calculate_technical_indicators(df)
+    indicators = pd.DataFrame(values, index=df.index, columns=list(_TA_COLUMNS))
+    return pd.concat([df.drop(columns=list(_TA_COLUMNS), errors='ignore'), indicators], axis=1)
+
+def downsample_ohlc(df: pd.DataFrame, max_points: int = MAX_CHART_POINTS) -> pd.DataFrame:
+    """
+    Aggregate consecutive rows into at most max_points OHLC buckets,
+    keeping each bucket's extremes so the chart shape is preserved
+    """
+    if len(df) <= max_points:
+        return df
+
+    bucket = -(-len(df) // max_points)
+    agg = {column: 'last' for column in df.columns}
+    agg.update({'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'})
+    reduced = df.groupby(np.arange(len(df)) // bucket).agg(agg)
+    reduced.index = df.index[::bucket]
+    return reduced
+
+@st.cache_data(ttl=HISTORY_TTL, max_entries=32, show_spinner=False)
+def build_base_chart(_df: pd.DataFrame, ticker_symbol: str, period: str,
+                     last_bar: tuple, length: int, dark_mode: bool = True) -> go.Figure:
+    """
+    Build the candlestick and volume figure shared by every indicator selection
+
+    The frame itself is not hashed; ticker_symbol, period, last_bar (the
+    final row's date and OHLCV, which yfinance rewrites intraday) and length
+    identify it. st.cache_data hands back a fresh copy on each call,
+    so callers may add traces to the returned figure without touching the
+    cached one.
+    """
+    df = _df
 
     # Create figure with secondary y-axis
     fig = make_subplots(rows=3, cols=1, shared_xaxes=True,
                         vertical_spacing=0.05,
                         row_heights=[0.5, 0.25, 0.25])
 
-    # Candlestick chart
+    # Candlestick chart, or lighter OHLC bars for long horizons
+    price_trace = go.Ohlc if len(df) > WEBGL_THRESHOLD else go.Candlestick
     fig.add_trace(
-        go.Candlestick(
+        price_trace(
             x=df.index,
             open=df['Open'],
             high=df['High'],
@@ -80,37 +342,12 @@ def create_price_chart(df: pd.DataFrame, show_indicators: dict = None, dark_mode
         row=1, col=1
     )
 
-    # Add technical indicators
-    if show_indicators['sma']:
-        fig.add_trace(go.Scatter(x=df.index, y=df['SMA_20'], name='SMA 20', line=dict(color='orange')), row=1, col=1)
-        fig.add_trace(go.Scatter(x=df.index, y=df['SMA_50'], name='SMA 50', line=dict(color='blue')), row=1, col=1)
-
-    if show_indicators['ema']:
-        fig.add_trace(go.Scatter(x=df.index, y=df['EMA_20'], name='EMA 20', line=dict(color='purple')), row=1, col=1)
-
-    if show_indicators['bollinger']:
-        fig.add_trace(go.Scatter(x=df.index, y=df['BB_upper'], name='BB Upper', line=dict(color='gray', dash='dash')), row=1, col=1)
-        fig.add_trace(go.Scatter(x=df.index, y=df['BB_middle'], name='BB Middle', line=dict(color='gray')), row=1, col=1)
-        fig.add_trace(go.Scatter(x=df.index, y=df['BB_lower'], name='BB Lower', line=dict(color='gray', dash='dash')), row=1, col=1)
-
     # Volume chart
     fig.add_trace(
         go.Bar(x=df.index, y=df['Volume'], name='Volume'),
         row=2, col=1
     )
 
-    # RSI
-    if show_indicators['rsi']:
-        fig.add_trace(go.Scatter(x=df.index, y=df['RSI'], name='RSI', line=dict(color='orange')), row=2, col=1)
-        fig.add_hline(y=70, line_dash="dash", line_color="red", row=2, col=1)
-        fig.add_hline(y=30, line_dash="dash", line_color="green", row=2, col=1)
-
-    # MACD
-    if show_indicators['macd']:
-        fig.add_trace(go.Scatter(x=df.index, y=df['MACD'], name='MACD', line=dict(color='blue')), row=3, col=1)
-        fig.add_trace(go.Scatter(x=df.index, y=df['MACD_Signal'], name='Signal', line=dict(color='orange')), row=3, col=1)
-        fig.add_trace(go.Bar(x=df.index, y=df['MACD_Hist'], name='MACD Histogram'), row=3, col=1)
-
     # Update layout
     fig.update_layout(
         template='plotly_dark' if dark_mode else 'plotly_white',
@@ -122,13 +359,70 @@ def create_price_chart(df: pd.DataFrame, show_indicators: dict = None, dark_mode
 
     return fig
 
+def overlay_indicators(fig: go.Figure, df: pd.DataFrame, show_indicators: dict) -> go.Figure:
+    """
+    Add the selected technical indicator traces to a base chart
+    """
+    scatter = go.Scattergl if len(df) > WEBGL_THRESHOLD else go.Scatter
+
+    if show_indicators['sma']:
+        fig.add_trace(scatter(x=df.index, y=df['SMA_20'], name='SMA 20', line=dict(color='orange')), row=1, col=1)
+        fig.add_trace(scatter(x=df.index, y=df['SMA_50'], name='SMA 50', line=dict(color='blue')), row=1, col=1)
+
+    if show_indicators['ema']:
+        fig.add_trace(scatter(x=df.index, y=df['EMA_20'], name='EMA 20', line=dict(color='purple')), row=1, col=1)
+
+    if show_indicators['bollinger']:
+        fig.add_trace(scatter(x=df.index, y=df['BB_upper'], name='BB Upper', line=dict(color='gray', dash='dash')), row=1, col=1)
+        fig.add_trace(scatter(x=df.index, y=df['BB_middle'], name='BB Middle', line=dict(color='gray')), row=1, col=1)
+        fig.add_trace(scatter(x=df.index, y=df['BB_lower'], name='BB Lower', line=dict(color='gray', dash='dash')), row=1, col=1)
+
+    # RSI
+    if show_indicators['rsi']:
+        fig.add_trace(scatter(x=df.index, y=df['RSI'], name='RSI', line=dict(color='orange')), row=2, col=1)
+        fig.add_hline(y=70, line_dash="dash", line_color="red", row=2, col=1)
+        fig.add_hline(y=30, line_dash="dash", line_color="green", row=2, col=1)
+
+    # MACD
+    if show_indicators['macd']:
+        fig.add_trace(scatter(x=df.index, y=df['MACD'], name='MACD', line=dict(color='blue')), row=3, col=1)
+        fig.add_trace(scatter(x=df.index, y=df['MACD_Signal'], name='Signal', line=dict(color='orange')), row=3, col=1)
+        fig.add_trace(go.Bar(x=df.index, y=df['MACD_Hist'], name='MACD Histogram'), row=3, col=1)
+
+    return fig
+
+def create_price_chart(df: pd.DataFrame, ticker_symbol: str, period: str,
+                       show_indicators: dict = None, dark_mode: bool = True) -> go.Figure:
+    """
+    Create an interactive price chart with technical indicators
+    """
+    if show_indicators is None:
+        show_indicators = {
+            'sma': False,
+            'ema': False,
+            'bollinger': False,
+            'rsi': False,
+            'macd': False
+        }
+
+    last_bar = (df.index[-1], *df[['Open', 'High', 'Low', 'Close', 'Volume']].iloc[-1].tolist())
+    length = len(df)
+
+    # Calculate indicators on the full series, then thin it out for rendering
+    df = calculate_technical_indicators(df)
+    df = downsample_ohlc(df)
+
+    fig = build_base_chart(df, ticker_symbol, period, last_bar, length, dark_mode)
+    return overlay_indicators(fig, df, show_indicators)
+
 def calculate_metrics(df: pd.DataFrame) -> dict:
     """
     Calculate key financial metrics
     """
+    returns = df['Close'].pct_change()
     metrics = {
-        'Daily Returns': df['Close'].pct_change().mean() * 100,
-        'Volatility': df['Close'].pct_change().std() * 100,
+        'Daily Returns': returns.mean() * 100,
+        'Volatility': returns.std() * 100,
         'Highest Price': df['High'].max(),
         'Lowest Price': df['Low'].min(),
         'Average Volume': df['Volume'].mean()
@@ -139,10 +433,21 @@ def format_large_number(num: float) -> str:
     """
     Format large numbers for display
     """
-    if num >= 1e9:
-        return f"{num/1e9:.2f}B"
-    elif num >= 1e6:
-        return f"{num/1e6:.2f}M"
-    elif num >= 1e3:
-        return f"{num/1e3:.2f}K"
-    return f"{num:.2f}"
\ No newline at end of file
+    if num is None or num != num:
+        return "N/A"
+    for threshold, suffix in _SCALES:
+        if abs(num) >= threshold:
+            return f"{num/threshold:.2f}{suffix}"
+    return f"{num:.2f}"
+
+def format_large_number_array(values) -> np.ndarray:
+    """
+    Vectorized format_large_number for whole columns of numbers
+    """
+    arr = np.asarray(values, dtype=np.float64)
+    magnitude = np.abs(arr)
+    conditions = [magnitude >= threshold for threshold, _ in _SCALES]
+    scaled = np.select(conditions, [arr / threshold for threshold, _ in _SCALES], default=arr)
+    suffixes = np.select(conditions, [suffix for _, suffix in _SCALES], default='')
+    formatted = np.char.add(np.char.mod('%.2f', scaled), suffixes)
+    return np.where(np.isnan(arr), 'N/A', formatted)